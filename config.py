@@ -14,6 +14,8 @@ DB_NAME = os.getenv("DB_NAME", "finance_db")
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "yourpassword")
 DB_CONNECTION_STRING = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DB_POOL_MIN_CONN = int(os.getenv("DB_POOL_MIN_CONN", "1"))
+DB_POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "10"))
 
 # Categorization Rules
 CATEGORY_PATTERNS = {
@@ -26,6 +28,37 @@ CATEGORY_PATTERNS = {
     'Shopping': re.compile(r'AMZN|AMAZON.*|TARGET|WALMART', re.IGNORECASE),
 }
 
+# All categories fused into one regex, one named group per category.
+# Each category is a lookahead anchored at the start of the text, so the
+# first category (in the order above) that matches anywhere wins.
+CATEGORY_GROUPS = {re.sub(r'\W', '_', category): category for category in CATEGORY_PATTERNS}
+CATEGORY_REGEX = re.compile(
+    '^(?:' + '|'.join(
+        rf'(?=[\s\S]*?(?P<{group}>{CATEGORY_PATTERNS[category].pattern}))'
+        for group, category in CATEGORY_GROUPS.items()
+    ) + ')',
+    re.IGNORECASE,
+)
+
 # CSV Settings
 DATE_FORMAT = "%m/%d/%Y"
 EXPECTED_COLUMNS = ['date', 'description', 'category', 'transaction_type', 'amount']
+# Columns that identify a transaction; rows equal on all of them are duplicates
+DEDUPE_COLUMNS = ['date', 'amount', 'description']
+# Column types for reading raw CSVs (pyarrow type aliases). Only these
+# columns are read; dates stay strings and are parsed during cleaning.
+READ_DTYPES = {
+    'date': 'string',
+    'description': 'string',
+    'category': 'string',
+    'transaction_type': 'string',
+    'amount': 'float64',
+}
+# Pipeline log level (DEBUG adds per-step details and distributions)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Files processed in parallel by the watchers (one worker process each)
+MAX_WORKERS = int(os.getenv("ETL_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+# Large CSVs are read and processed in blocks of about this many bytes
+CSV_CHUNK_BYTES = int(os.getenv("CSV_CHUNK_BYTES", str(16 * 1024 * 1024)))
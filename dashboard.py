@@ -2,12 +2,20 @@
 Personal Finance Dashboard
 Streamlit app for visualizing transaction data from PostgreSQL
 """
+import time
 import streamlit as st
 import pandas as pd
+import connectorx as cx
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from psycopg2.extensions import encodings
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-from database import get_connection
+from config import DB_CONNECTION_STRING
+from database import get_connection, create_table_if_not_exists
 
 # Page config
 st.set_page_config(
@@ -37,10 +45,131 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+def read_sql(query, params=None):
+    """
+    Run a SELECT and return the result as a DataFrame
+    
+    Reads go through connectorx, which streams Arrow batches and builds
+    typed columns (dates included) without per-row Python objects.
+    Parameters are bound client-side by psycopg2 so values are quoted
+    exactly as they would be for a normal cursor.execute().
+    
+    Args:
+        query (str): SQL with %s placeholders
+        params (sequence): Values for the placeholders
+        
+    Returns:
+        pd.DataFrame: Query result
+    """
+    if params:
+        with get_connection() as conn, conn.cursor() as cur:
+            query = cur.mogrify(query, params).decode(encodings[conn.encoding])
+    return cx.read_sql(DB_CONNECTION_STRING, query, return_type="pandas", protocol="binary")
+
+
+@st.cache_resource
+def ensure_schema():
+    """Create the table, generated columns and summary view once per server"""
+    create_table_if_not_exists()
+    return True
+
+
 @st.cache_data(ttl=60)  # Cache for 60 seconds
-def load_all_transactions():
-    """Load all transactions from database"""
+def load_overview():
+    """
+    Row count, date range and filter options for the whole table
+    
+    Only aggregates are fetched, so the rows themselves are transferred
+    once per view (by load_transactions) rather than twice.
+    
+    Returns:
+        dict: row_count, min_date, max_date, categories, transaction_types
+            and a version stamp that changes every time this is reloaded,
+            usable as a cheap cache key for anything derived from it
+    """
+    totals = read_sql("""
+    SELECT
+        COUNT(*) AS row_count,
+        MIN(transaction_date) AS min_date,
+        MAX(transaction_date) AS max_date
+    FROM transactions
+    """).iloc[0]
+    values = read_sql("SELECT DISTINCT category, transaction_type FROM transactions")
+    
+    return {
+        'row_count': int(totals['row_count']),
+        'min_date': totals['min_date'],
+        'max_date': totals['max_date'],
+        'categories': sorted(values['category'].dropna().unique()),
+        'transaction_types': sorted(values['transaction_type'].dropna().unique()),
+        'version': time.time_ns()
+    }
+
+
+@st.cache_data(ttl=60)
+def get_summary_stats(version):
+    """
+    Calculate summary statistics
+    
+    Read from the pre-aggregated monthly_totals view. Keyed on the data
+    version so the stats refresh whenever the transactions are reloaded.
+    """
     query = """
+    SELECT
+        COALESCE(SUM(transaction_count), 0) AS total_transactions,
+        COALESCE(SUM(income_amount), 0) AS total_income,
+        COALESCE(SUM(expense_amount), 0) AS total_expenses
+    FROM monthly_totals
+    """
+    totals = read_sql(query).iloc[0]
+    total_income = float(totals['total_income'])
+    total_expenses = float(totals['total_expenses'])
+    
+    return {
+        'total_transactions': int(totals['total_transactions']),
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'net_balance': total_income - total_expenses
+    }
+
+
+def _filter_clause(start_date=None, end_date=None, category=None, transaction_type=None):
+    """
+    Build a WHERE clause for the sidebar filters
+    
+    Args:
+        start_date, end_date (date): Inclusive date range (None = no limit)
+        category (str): Category to keep (None = all)
+        transaction_type (str): Transaction type to keep (None = all)
+        
+    Returns:
+        tuple: (where_sql, params) for use with %s placeholders
+    """
+    conditions = []
+    params = []
+    
+    if start_date is not None:
+        conditions.append("transaction_date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        conditions.append("transaction_date <= %s")
+        params.append(end_date)
+    if category is not None:
+        conditions.append("category = %s")
+        params.append(category)
+    if transaction_type is not None:
+        conditions.append("transaction_type = %s")
+        params.append(transaction_type)
+    
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where_sql, params
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_transactions(start_date=None, end_date=None, category=None, transaction_type=None):
+    """Load the transactions matching the sidebar filters, filtered in PostgreSQL"""
+    where_sql, params = _filter_clause(start_date, end_date, category, transaction_type)
+    query = f"""
     SELECT 
         transaction_date,
         transaction_desc,
@@ -49,60 +178,95 @@ def load_all_transactions():
         amount,
         month_year
     FROM transactions
+    {where_sql}
     ORDER BY transaction_date DESC
     """
     
-    conn = get_connection()
-    try:
-        df = pd.read_sql_query(query, conn, parse_dates=['transaction_date'])
-        return df
-    finally:
-        conn.close()
+    return read_sql(query, params)
+
+
+def _totals_source(start_date, end_date):
+    """
+    Pick the relation to aggregate from
+    
+    monthly_totals has no day-level dates, so it can only stand in for the
+    transactions table when no date range is applied.
+    """
+    return 'monthly_totals' if start_date is None and end_date is None else 'transactions'
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def to_csv_bytes(start_date=None, end_date=None, category=None, transaction_type=None):
+    """
+    Filtered transactions as CSV bytes for the download button
+    
+    Written with pyarrow's multi-threaded CSV writer and cached per filter
+    combination, so reruns that keep the same filters don't serialise the
+    data again.
+    """
+    df = load_transactions(start_date, end_date, category, transaction_type)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    
+    # Write dates as YYYY-MM-DD rather than full timestamps
+    date_idx = table.schema.get_field_index('transaction_date')
+    table = table.set_column(date_idx, 'transaction_date', pc.cast(table['transaction_date'], pa.date32()))
+    
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(table, sink)
+    return sink.getvalue().to_pybytes()
 
 
 @st.cache_data(ttl=60)
-def get_summary_stats(df):
-    """Calculate summary statistics"""
-    total_transactions = len(df)
-    total_income = df[df['transaction_type'] == 'Credit']['amount'].sum()
-    total_expenses = df[df['transaction_type'] == 'Debit']['amount'].sum()
-    net_balance = total_income + total_expenses  # Expenses are negative
+def load_category_totals(start_date=None, end_date=None, category=None, transaction_type=None):
+    """Total spending per category, aggregated in PostgreSQL"""
+    where_sql, params = _filter_clause(start_date, end_date, category, transaction_type)
+    query = f"""
+    SELECT category, SUM(expense_amount) AS expense_amount
+    FROM {_totals_source(start_date, end_date)}
+    {where_sql}
+    GROUP BY 1
+    HAVING SUM(expense_amount) > 0
+    """
     
-    return {
-        'total_transactions': total_transactions,
-        'total_income': total_income,
-        'total_expenses': abs(total_expenses),
-        'net_balance': net_balance
-    }
+    return read_sql(query, params)
 
 
-def create_category_pie_chart(df):
+@st.cache_data(ttl=60)
+def load_monthly_totals(start_date=None, end_date=None, category=None, transaction_type=None):
+    """Total income and spending per month, aggregated in PostgreSQL"""
+    where_sql, params = _filter_clause(start_date, end_date, category, transaction_type)
+    query = f"""
+    SELECT
+        month_year,
+        SUM(income_amount) AS income_amount,
+        SUM(expense_amount) AS expense_amount
+    FROM {_totals_source(start_date, end_date)}
+    {where_sql}
+    GROUP BY 1
+    ORDER BY 1
+    """
+    
+    return read_sql(query, params)
+
+
+def create_category_pie_chart(category_totals):
     """Create pie chart for spending by category"""
-    # Filter only expenses (debits)
-    expenses = df[df['transaction_type'] == 'Debit'].copy()
-    
-    # Group by category
-    category_spending = expenses.groupby('category')['amount'].sum().abs().reset_index()
-    category_spending.columns = ['Category', 'Amount']
-    category_spending = category_spending.sort_values('Amount', ascending=False)
-    
-    # Create pie chart
-    fig = px.pie(
-        category_spending,
-        values='Amount',
-        names='Category',
-        title='Spending by Category',
-        hole=0.4,  # Donut chart
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
+    category_spending = category_totals.sort_values('expense_amount', ascending=False)
     
-    fig.update_traces(
+    # Create pie chart from plain arrays (skips plotly express' DataFrame handling)
+    fig = go.Figure(go.Pie(
+        labels=category_spending['category'].to_numpy(),
+        values=category_spending['expense_amount'].to_numpy(),
+        hole=0.4,  # Donut chart
+        marker=dict(colors=px.colors.qualitative.Set3),
+        sort=False,
         textposition='inside',
         textinfo='percent+label',
         hovertemplate='<b>%{label}</b><br>Amount: $%{value:,.2f}<br>Percent: %{percent}<extra></extra>'
-    )
+    ))
     
     fig.update_layout(
+        title='Spending by Category',
         showlegend=True,
         height=500
     )
@@ -110,36 +274,23 @@ def create_category_pie_chart(df):
     return fig
 
 
-def create_monthly_trend_chart(df):
+def create_monthly_trend_chart(monthly):
     """Create line chart for monthly spending trends"""
-    # Group by month and transaction type
-    monthly = df.groupby(['month_year', 'transaction_type'])['amount'].sum().reset_index()
-    
-    # Pivot to have income and expenses as separate columns
-    monthly_pivot = monthly.pivot(index='month_year', columns='transaction_type', values='amount').reset_index()
-    monthly_pivot = monthly_pivot.fillna(0)
-    
-    # Make expenses positive for display
-    if 'Debit' in monthly_pivot.columns:
-        monthly_pivot['Expenses'] = monthly_pivot['Debit'].abs()
-    else:
-        monthly_pivot['Expenses'] = 0
-    
-    if 'Credit' in monthly_pivot.columns:
-        monthly_pivot['Income'] = monthly_pivot['Credit']
-    else:
-        monthly_pivot['Income'] = 0
+    # Income and expenses (already positive) per month, as plain arrays
+    months = monthly['month_year'].to_numpy()
+    income = monthly['income_amount'].to_numpy(dtype=float)
+    expenses = monthly['expense_amount'].to_numpy(dtype=float)
     
     # Calculate net
-    monthly_pivot['Net'] = monthly_pivot['Income'] - monthly_pivot['Expenses']
+    net = income - expenses
     
     # Create figure
     fig = go.Figure()
     
     # Add income trace
     fig.add_trace(go.Scatter(
-        x=monthly_pivot['month_year'],
-        y=monthly_pivot['Income'],
+        x=months,
+        y=income,
         mode='lines+markers',
         name='Income',
         line=dict(color='green', width=3),
@@ -148,8 +299,8 @@ def create_monthly_trend_chart(df):
     
     # Add expenses trace
     fig.add_trace(go.Scatter(
-        x=monthly_pivot['month_year'],
-        y=monthly_pivot['Expenses'],
+        x=months,
+        y=expenses,
         mode='lines+markers',
         name='Expenses',
         line=dict(color='red', width=3),
@@ -158,8 +309,8 @@ def create_monthly_trend_chart(df):
     
     # Add net trace
     fig.add_trace(go.Scatter(
-        x=monthly_pivot['month_year'],
-        y=monthly_pivot['Net'],
+        x=months,
+        y=net,
         mode='lines+markers',
         name='Net (Income - Expenses)',
         line=dict(color='blue', width=3, dash='dash'),
@@ -185,35 +336,27 @@ def create_monthly_trend_chart(df):
     return fig
 
 
-def create_category_bar_chart(df):
+def create_category_bar_chart(category_totals):
     """Create horizontal bar chart for category breakdown"""
-    # Group by category
-    category_data = df.groupby(['category', 'transaction_type'])['amount'].sum().reset_index()
-    
-    # Separate income and expenses
-    expenses = category_data[category_data['transaction_type'] == 'Debit'].copy()
-    expenses['amount'] = expenses['amount'].abs()
-    expenses = expenses.sort_values('amount', ascending=True)
-    
-    # Create horizontal bar chart
-    fig = px.bar(
-        expenses,
-        x='amount',
-        y='category',
-        orientation='h',
-        title='Spending by Category (Detailed)',
-        labels={'amount': 'Amount ($)', 'category': 'Category'},
-        color='amount',
-        color_continuous_scale='Reds',
-        text='amount'
-    )
+    expenses = category_totals.sort_values('expense_amount', ascending=True)
+    amounts = expenses['expense_amount'].to_numpy(dtype=float)
     
-    fig.update_traces(
+    # Create horizontal bar chart from plain arrays
+    fig = go.Figure(go.Bar(
+        x=amounts,
+        y=expenses['category'].to_numpy(),
+        orientation='h',
+        marker=dict(color=amounts, colorscale='Reds'),
+        text=amounts,
         texttemplate='$%{text:,.2f}',
-        textposition='outside'
-    )
+        textposition='outside',
+        hovertemplate='Category=%{y}<br>Amount ($)=%{x}<extra></extra>'
+    ))
     
     fig.update_layout(
+        title='Spending by Category (Detailed)',
+        xaxis_title='Amount ($)',
+        yaxis_title='Category',
         height=400,
         showlegend=False
     )
@@ -224,11 +367,10 @@ def create_category_bar_chart(df):
 def create_transaction_timeline(df):
     """Create timeline scatter plot of transactions"""
     # Take recent transactions only
-    recent_df = df.head(100).copy()
+    recent_df = df.head(100)
     
     # Color code by type
     color_map = {'Credit': 'green', 'Debit': 'red', 'Neutral': 'gray'}
-    recent_df['color'] = recent_df['transaction_type'].map(color_map)
     
     fig = px.scatter(
         recent_df,
@@ -250,6 +392,56 @@ def create_transaction_timeline(df):
     return fig
 
 
+def create_dashboard_figure(category_totals, monthly_totals, transactions):
+    """
+    Combine all dashboard charts into a single figure
+    
+    One figure is one JSON payload over the Streamlit websocket and one
+    layout pass in the browser, instead of four.
+    """
+    fig = make_subplots(
+        rows=3,
+        cols=2,
+        specs=[
+            [{'type': 'domain'}, {'type': 'xy'}],
+            [{'type': 'xy', 'colspan': 2}, None],
+            [{'type': 'xy', 'colspan': 2}, None]
+        ],
+        row_heights=[0.4, 0.3, 0.3],
+        vertical_spacing=0.08,
+        subplot_titles=(
+            'Spending by Category',
+            'Monthly Financial Trends',
+            'Spending by Category (Detailed)',
+            'Recent Transaction Timeline (Last 100)'
+        )
+    )
+    
+    panels = [
+        (create_category_pie_chart(category_totals), 1, 1),
+        (create_monthly_trend_chart(monthly_totals), 1, 2),
+        (create_category_bar_chart(category_totals), 2, 1),
+        (create_transaction_timeline(transactions), 3, 1)
+    ]
+    for panel, row, col in panels:
+        for trace in panel.data:
+            fig.add_trace(trace, row=row, col=col)
+    
+    fig.update_xaxes(title_text='Month', row=1, col=2)
+    fig.update_yaxes(title_text='Amount ($)', row=1, col=2)
+    fig.update_xaxes(title_text='Amount ($)', row=2, col=1)
+    fig.update_yaxes(title_text='Category', row=2, col=1)
+    fig.update_xaxes(title_text='Date', row=3, col=1)
+    fig.update_yaxes(title_text='Amount ($)', row=3, col=1)
+    
+    fig.update_layout(
+        height=1300,
+        hovermode='closest'
+    )
+    
+    return fig
+
+
 # ============================================================================
 # MAIN DASHBOARD
 # ============================================================================
@@ -261,15 +453,16 @@ def main():
     # Load data
     try:
         with st.spinner('Loading data from database...'):
-            df = load_all_transactions()
+            ensure_schema()
+            overview = load_overview()
         
-        if df.empty:
+        if overview['row_count'] == 0:
             st.warning("📭 No transactions found in the database.")
             st.info("💡 **Getting Started:**\n1. Drop a CSV file into `finance/watch/`\n2. Wait for processing\n3. Refresh this page")
             return
         
         # Calculate summary stats
-        stats = get_summary_stats(df)
+        stats = get_summary_stats(overview['version'])
         
         # ============================================
         # SIDEBAR - Filters
@@ -277,8 +470,8 @@ def main():
         st.sidebar.header("🔍 Filters")
         
         # Date range filter
-        min_date = pd.to_datetime(df['transaction_date']).min().date()
-        max_date = pd.to_datetime(df['transaction_date']).max().date()
+        min_date = pd.Timestamp(overview['min_date']).date()
+        max_date = pd.Timestamp(overview['max_date']).date()
         
         date_range = st.sidebar.date_input(
             "Date Range",
@@ -287,32 +480,24 @@ def main():
             max_value=max_date
         )
         
+        categories = ['All'] + overview['categories']
+        trans_types = ['All'] + overview['transaction_types']
+        
         # Category filter
-        categories = ['All'] + sorted(df['category'].unique().tolist())
         selected_category = st.sidebar.selectbox("Category", categories)
         
         # Transaction type filter
-        trans_types = ['All'] + sorted(df['transaction_type'].unique().tolist())
         selected_type = st.sidebar.selectbox("Transaction Type", trans_types)
         
-        # Apply filters
-        filtered_df = df.copy()
+        # Apply filters (None = no filter; the full date range counts as none)
+        start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+        if (start_date, end_date) == (min_date, max_date):
+            start_date, end_date = None, None
+        category_filter = None if selected_category == 'All' else selected_category
+        type_filter = None if selected_type == 'All' else selected_type
+        filters = (start_date, end_date, category_filter, type_filter)
         
-        if len(date_range) == 2:
-            start_date, end_date = date_range
-            # Convert date objects to pandas Timestamps for comparison
-            start_ts = pd.Timestamp(start_date)
-            end_ts = pd.Timestamp(end_date)
-            filtered_df = filtered_df[
-                (filtered_df['transaction_date'] >= start_ts) &
-                (filtered_df['transaction_date'] <= end_ts)
-            ]
-        
-        if selected_category != 'All':
-            filtered_df = filtered_df[filtered_df['category'] == selected_category]
-        
-        if selected_type != 'All':
-            filtered_df = filtered_df[filtered_df['transaction_type'] == selected_type]
+        filtered_df = load_transactions(*filters)
         
         # ============================================
         # SUMMARY METRICS
@@ -356,20 +541,14 @@ def main():
         # VISUALIZATIONS
         # ============================================
         
-        # Row 1: Pie Chart and Monthly Trends
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.plotly_chart(create_category_pie_chart(filtered_df), use_container_width=True)
-        
-        with col2:
-            st.plotly_chart(create_monthly_trend_chart(filtered_df), use_container_width=True)
+        category_totals = load_category_totals(*filters)
+        monthly_totals = load_monthly_totals(*filters)
         
-        # Row 2: Category Bar Chart
-        st.plotly_chart(create_category_bar_chart(filtered_df), use_container_width=True)
-        
-        # Row 3: Transaction Timeline
-        st.plotly_chart(create_transaction_timeline(filtered_df), use_container_width=True)
+        # Pie chart, monthly trends, category bars and timeline in one figure
+        st.plotly_chart(
+            create_dashboard_figure(category_totals, monthly_totals, filtered_df),
+            use_container_width=True
+        )
         
         st.markdown("---")
         
@@ -382,28 +561,25 @@ def main():
         if selected_category != 'All' or selected_type != 'All':
             st.info(f"📌 Showing {len(filtered_df)} transactions (filtered)")
         
-        # Format the dataframe for display
-        display_df = filtered_df.copy()
-        display_df['amount'] = display_df['amount'].apply(lambda x: f"${x:,.2f}")
-        display_df = display_df.rename(columns={
-            'transaction_date': 'Date',
-            'transaction_desc': 'Description',
-            'category': 'Category',
-            'transaction_type': 'Type',
-            'amount': 'Amount'
-        })
-        
+        # Formatting is done client-side by Streamlit via column_config
+        display_cols = ['transaction_date', 'transaction_desc', 'category', 'transaction_type', 'amount']
         st.dataframe(
-            display_df[['Date', 'Description', 'Category', 'Type', 'Amount']],
+            filtered_df[display_cols],
             use_container_width=True,
-            height=400
+            height=400,
+            column_config={
+                'transaction_date': st.column_config.DateColumn('Date'),
+                'transaction_desc': 'Description',
+                'category': 'Category',
+                'transaction_type': 'Type',
+                'amount': st.column_config.NumberColumn('Amount', format="$%.2f")
+            }
         )
         
         # Download button
-        csv = filtered_df.to_csv(index=False)
         st.download_button(
             label="📥 Download Filtered Data as CSV",
-            data=csv,
+            data=to_csv_bytes(*filters),
             file_name=f"transactions_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv"
         )
@@ -2,69 +2,336 @@
 Database Module
 Handles PostgreSQL connection and data insertion
 """
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import execute_values
 import pandas as pd
-from config import DB_CONNECTION_STRING
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from config import DB_CONNECTION_STRING, DB_POOL_MIN_CONN, DB_POOL_MAX_CONN
 
+logger = logging.getLogger(__name__)
 
-def get_connection():
+# Shared connection pool, created on first use so that importing this
+# module never requires the database to be up. Tied to the process that
+# created it: forked workers must not reuse the parent's connections.
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool():
     """
-    Create a connection to PostgreSQL
+    Return the module-level connection pool, creating it if needed
     
     Returns:
+        ThreadedConnectionPool: Shared PostgreSQL connection pool
+    """
+    global _POOL, _POOL_PID
+    if _POOL is None or _POOL_PID != os.getpid():
+        with _POOL_LOCK:
+            if _POOL is None or _POOL_PID != os.getpid():
+                try:
+                    _POOL = ThreadedConnectionPool(DB_POOL_MIN_CONN, DB_POOL_MAX_CONN, DB_CONNECTION_STRING)
+                    _POOL_PID = os.getpid()
+                except psycopg2.OperationalError as e:
+                    raise ConnectionError(
+                        f"❌ Cannot connect to PostgreSQL!\n"
+                        f"Error: {e}\n"
+                        f"Make sure Docker container is running: docker-compose up -d"
+                    )
+                atexit.register(_POOL.closeall)
+    return _POOL
+
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a connection from the pool, returning it when done
+    
+    Usage:
+        with get_connection() as conn:
+            ...
+    
+    Yields:
         psycopg2.connection: Database connection
     """
+    pool = _get_pool()
     try:
-        conn = psycopg2.connect(DB_CONNECTION_STRING)
-        return conn
+        conn = pool.getconn()
     except psycopg2.OperationalError as e:
         raise ConnectionError(
             f"❌ Cannot connect to PostgreSQL!\n"
             f"Error: {e}\n"
             f"Make sure Docker container is running: docker-compose up -d"
         )
+    try:
+        yield conn
+    finally:
+        # Don't hand a connection with an open transaction back to the pool
+        broken = bool(conn.closed)
+        if not broken and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        pool.putconn(conn, close=broken)
+
+
+CREATE_TABLE_SQL = """
+-- Partitioned by year of transaction_date so date-filtered queries only
+-- touch the relevant partitions (created on demand by _ensure_partitions)
+CREATE TABLE IF NOT EXISTS transactions (
+    id SERIAL,
+    transaction_date DATE NOT NULL,
+    transaction_desc TEXT,
+    category VARCHAR(50) NOT NULL,
+    transaction_type VARCHAR(20) NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    month_year VARCHAR(7) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, transaction_date)
+) PARTITION BY RANGE (transaction_date);
+
+-- Create index for faster queries
+CREATE INDEX IF NOT EXISTS idx_transaction_date ON transactions(transaction_date);
+CREATE INDEX IF NOT EXISTS idx_category ON transactions(category);
+CREATE INDEX IF NOT EXISTS idx_month_year ON transactions(month_year);
+
+-- Pre-signed amounts so readers don't have to filter by type and abs()
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS income_amount NUMERIC(12, 2)
+    GENERATED ALWAYS AS (CASE WHEN transaction_type = 'Credit' THEN amount ELSE 0 END) STORED;
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS expense_amount NUMERIC(12, 2)
+    GENERATED ALWAYS AS (CASE WHEN transaction_type = 'Debit' THEN ABS(amount) ELSE 0 END) STORED;
+
+-- Covering indexes for the dashboard: filtered/sorted reads and the
+-- monthly aggregates can be answered with index-only scans.
+-- transaction_desc is unbounded text, so it is not included: a long memo
+-- would exceed the btree row size limit and fail the whole load
+DROP INDEX IF EXISTS idx_txn_date_cat_type;
+CREATE INDEX IF NOT EXISTS idx_txn_date_filters ON transactions(transaction_date DESC, category, transaction_type)
+    INCLUDE (amount, month_year);
+CREATE INDEX IF NOT EXISTS idx_month_year_type ON transactions(month_year, transaction_type)
+    INCLUDE (amount, income_amount, expense_amount);
+
+-- Per-month totals for the dashboard, refreshed after every insert
+CREATE MATERIALIZED VIEW IF NOT EXISTS monthly_totals AS
+SELECT
+    month_year,
+    category,
+    transaction_type,
+    COUNT(*) AS transaction_count,
+    SUM(amount) AS amount,
+    SUM(income_amount) AS income_amount,
+    SUM(expense_amount) AS expense_amount
+FROM transactions
+GROUP BY month_year, category, transaction_type;
+"""
+
+REFRESH_SUMMARY_SQL = "REFRESH MATERIALIZED VIEW monthly_totals"
+
+# True once CREATE_TABLE_SQL has been applied in its current form
+SCHEMA_READY_SQL = """
+SELECT to_regclass('monthly_totals') IS NOT NULL
+    AND to_regclass('idx_txn_date_filters') IS NOT NULL
+"""
+
+# Set once the DDL above has been committed, so steady-state inserts skip it
+_table_ready = False
+
+# Whether transactions is partitioned (tables created before partitioning
+# was introduced are not) and which yearly partitions are known to exist
+_partitioned = None
+_partition_years = set()
+
+# Advisory lock taken around schema/partition DDL so that parallel
+# workers loading files at the same time don't race to create objects
+DDL_LOCK_KEY = 727274
+
+# Advisory lock taken (as its own statement) before refreshing the summary,
+# so concurrent loads refresh one after another: a REFRESH that had to wait
+# for another one would otherwise still use the snapshot taken before it
+# waited and miss the rows that load committed
+SUMMARY_LOCK_KEY = 727275
+
+# Columns written by the ETL, in COPY/INSERT order
+INSERT_COLUMNS = ['transaction_date', 'transaction_desc', 'category', 'transaction_type', 'amount', 'month_year']
+
+# Batches smaller than this use a plain INSERT; larger ones use COPY
+COPY_MIN_ROWS = 100
+
+# Rows per multi-VALUES statement on the INSERT path
+INSERT_PAGE_SIZE = 1000
 
 
 def create_table_if_not_exists():
     """
     Create transactions table if it doesn't exist
+    
+    Runs in its own short transaction under DDL_LOCK_KEY. The DDL is
+    skipped when the schema is already in place (it is created in one
+    transaction, so the summary view and the newest index existing means
+    everything does): its ACCESS EXCLUSIVE locks would otherwise queue
+    behind loads in progress in other workers.
     """
-    create_table_sql = """
-    CREATE TABLE IF NOT EXISTS transactions (
-        id SERIAL PRIMARY KEY,
-        transaction_date DATE NOT NULL,
-        transaction_desc TEXT,
-        category VARCHAR(50) NOT NULL,
-        transaction_type VARCHAR(20) NOT NULL,
-        amount NUMERIC(12, 2) NOT NULL,
-        month_year VARCHAR(7) NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    
-    -- Create index for faster queries
-    CREATE INDEX IF NOT EXISTS idx_transaction_date ON transactions(transaction_date);
-    CREATE INDEX IF NOT EXISTS idx_category ON transactions(category);
-    CREATE INDEX IF NOT EXISTS idx_month_year ON transactions(month_year);
-    """
-    
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(create_table_sql)
-            conn.commit()
-            print("  ✅ Table 'transactions' ready")
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    global _table_ready
+    
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (DDL_LOCK_KEY,))
+                cur.execute(SCHEMA_READY_SQL)
+                if not cur.fetchone()[0]:
+                    cur.execute(CREATE_TABLE_SQL)
+                conn.commit()
+                _table_ready = True
+                logger.info("  ✅ Table 'transactions' ready")
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+
+def _ensure_partitions(years):
+    """
+    Create the yearly partitions needed for an insert
+    
+    Runs in its own short committed transaction, before the rows are
+    copied, so an insert never waits for DDL while holding locks on
+    transactions. Each partition is created as a plain table and then
+    attached: ATTACH PARTITION only needs SHARE UPDATE EXCLUSIVE on
+    transactions, which doesn't conflict with the ROW EXCLUSIVE lock held
+    by inserts still in progress (this one included), whereas
+    CREATE TABLE ... PARTITION OF needs ACCESS EXCLUSIVE. Does nothing if
+    the transactions table is not partitioned.
+    
+    Args:
+        years (iterable): Years present in the batch
+        
+    Returns:
+        set: The years, as ints, if transactions is partitioned (so each
+            has a partition now), else an empty set
+    """
+    global _partitioned
+    
+    years = {int(year) for year in years}
+    new_years = years - _partition_years
+    if not new_years or _partitioned is False:
+        return years if _partitioned else set()
+    
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                if _partitioned is None:
+                    cur.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'transactions'::regclass)")
+                    _partitioned = cur.fetchone()[0]
+                if _partitioned:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (DDL_LOCK_KEY,))
+                    for year in sorted(new_years):
+                        cur.execute("SELECT to_regclass(%s)", (f"transactions_{year}",))
+                        if cur.fetchone()[0] is None:
+                            cur.execute(
+                                f"CREATE TABLE transactions_{year} "
+                                f"(LIKE transactions INCLUDING DEFAULTS INCLUDING GENERATED)"
+                            )
+                            cur.execute(
+                                f"ALTER TABLE transactions ATTACH PARTITION transactions_{year} "
+                                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+                            )
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+    
+    if not _partitioned:
+        return set()
+    _partition_years.update(new_years)
+    return years
+
+
+def _prepare_partitions(cur, years, locked_years):
+    """
+    Make sure the load transaction can route rows for these years
+    
+    Missing partitions are created by _ensure_partitions(), then each one
+    is locked on the load connection the first time this transaction
+    needs it. Taking a new lock makes PostgreSQL process pending catalog
+    invalidations, so the next COPY sees partitions attached since the
+    transaction started; the lock it already holds on transactions
+    doesn't, and routing could otherwise miss the new partition.
+    
+    Args:
+        cur (psycopg2.cursor): Cursor inside the insert transaction
+        years (iterable): Years present in the batch
+        locked_years (set): Years already locked in this transaction;
+            updated in place
+    """
+    for year in sorted(_ensure_partitions(years) - locked_years):
+        cur.execute(f"LOCK TABLE transactions_{year} IN ROW EXCLUSIVE MODE")
+        locked_years.add(year)
+
+
+def _copy_buffer(df):
+    """
+    Serialise a batch as headerless CSV for COPY FROM STDIN
+    
+    Written with pyarrow's multi-threaded CSV writer. Dates are written as
+    YYYY-MM-DD and categoricals as plain text; nulls come out as empty
+    unquoted fields, which COPY reads as NULL.
+    
+    Args:
+        df (pd.DataFrame): Cleaned transaction data
+        
+    Returns:
+        pa.BufferReader: File-like CSV data for cursor.copy_expert()
+    """
+    table = pa.Table.from_pandas(df[INSERT_COLUMNS], preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.date32()))
+        elif pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(table, sink, pacsv.WriteOptions(include_header=False))
+    return pa.BufferReader(sink.getvalue())
+
+
+def _write_batch(cur, df):
+    """
+    Write one DataFrame of cleaned transactions with COPY or INSERT
+    
+    Args:
+        cur (psycopg2.cursor): Cursor inside the insert transaction
+        df (pd.DataFrame): Cleaned transaction data (not empty)
+    """
+    if len(df) >= COPY_MIN_ROWS:
+        cur.copy_expert(f"COPY transactions ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH CSV", _copy_buffer(df))
+    else:
+        data_tuples = list(df[INSERT_COLUMNS].itertuples(index=False, name=None))
+        insert_sql = f"""
+        INSERT INTO transactions ({', '.join(INSERT_COLUMNS)})
+        VALUES %s
+        """
+        execute_values(cur, insert_sql, data_tuples, page_size=INSERT_PAGE_SIZE)
 
 
 def insert_transactions(df):
     """
     Insert cleaned transaction data into PostgreSQL
     
+    Large batches are streamed with COPY FROM STDIN, which skips the SQL
+    parser/planner per row; small ones use a multi-row INSERT. The table
+    is created (in a short transaction of its own) before the first
+    insert; later calls go straight to the insert. Missing yearly
+    partitions are likewise created and committed before the rows are
+    copied, and the monthly_totals summary is refreshed before committing.
+    
     Args:
         df (pd.DataFrame): Cleaned transaction data
         
@@ -72,34 +339,56 @@ def insert_transactions(df):
         int: Number of rows inserted
     """
     if df.empty:
-        print("  ⚠️  No data to insert")
+        logger.warning("  ⚠️  No data to insert")
         return 0
     
-    # Ensure table exists
-    create_table_if_not_exists()
+    return insert_transaction_batches([df])
+
+
+def insert_transaction_batches(batches):
+    """
+    Insert several DataFrames of cleaned transactions in one transaction
     
-    # Prepare data for insertion
-    columns = ['transaction_date', 'transaction_desc', 'category', 'transaction_type', 'amount', 'month_year']
-    data_tuples = [tuple(row) for row in df[columns].values]
+    Works like insert_transactions() for each batch, but everything is
+    committed together (a failure part-way inserts nothing) and the
+    monthly_totals summary is refreshed once at the end. batches may be a
+    generator, so a large file can be cleaned and loaded chunk by chunk.
     
-    insert_sql = """
-    INSERT INTO transactions (transaction_date, transaction_desc, category, transaction_type, amount, month_year)
-    VALUES %s
+    Args:
+        batches (iterable): Cleaned transaction DataFrames
+        
+    Returns:
+        int: Number of rows inserted
     """
+    # Schema and partition DDL each run in their own short transaction
+    # (see _ensure_partitions) rather than inside the long COPY transaction
+    if not _table_ready:
+        create_table_if_not_exists()
     
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            execute_values(cur, insert_sql, data_tuples)
-            conn.commit()
-            rows_inserted = cur.rowcount
-            print(f"  ✅ Inserted {rows_inserted} rows into database")
-            return rows_inserted
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                rows_inserted = 0
+                locked_years = set()
+                for df in batches:
+                    if df.empty:
+                        continue
+                    _prepare_partitions(cur, df['transaction_date'].dt.year.unique(), locked_years)
+                    _write_batch(cur, df)
+                    rows_inserted += len(df)
+                
+                if rows_inserted:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (SUMMARY_LOCK_KEY,))
+                    cur.execute(REFRESH_SUMMARY_SQL)
+                conn.commit()
+                if rows_inserted:
+                    logger.info("  ✅ Inserted %d rows into database", rows_inserted)
+                else:
+                    logger.warning("  ⚠️  No data to insert")
+                return rows_inserted
+        except Exception as e:
+            conn.rollback()
+            raise e
 
 
 def get_transaction_count():
@@ -109,14 +398,11 @@ def get_transaction_count():
     Returns:
         int: Total transaction count
     """
-    conn = get_connection()
-    try:
+    with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT COUNT(*) FROM transactions")
             count = cur.fetchone()[0]
             return count
-    finally:
-        conn.close()
 
 
 def get_latest_transactions(limit=10):
@@ -136,12 +422,9 @@ def get_latest_transactions(limit=10):
     LIMIT %s
     """
     
-    conn = get_connection()
-    try:
+    with get_connection() as conn:
         df = pd.read_sql_query(query, conn, params=(limit,))
         return df
-    finally:
-        conn.close()
 
 
 def test_connection():
@@ -152,8 +435,7 @@ def test_connection():
         bool: True if connection successful
     """
     try:
-        conn = get_connection()
-        with conn.cursor() as cur:
+        with get_connection() as conn, conn.cursor() as cur:
             cur.execute("SELECT version();")
             version = cur.fetchone()[0]
             print(f"\n✅ PostgreSQL Connection Successful!")
@@ -175,7 +457,6 @@ def test_connection():
             else:
                 print(f"   Table 'transactions' does not exist yet")
         
-        conn.close()
         return True
     except Exception as e:
         print(f"\n❌ Database Connection Failed!")
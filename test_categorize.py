@@ -0,0 +1,130 @@
+# test_categorize.py
+"""
+Categorization consistency check
+Runs categorize_descriptions() with each backend in turn and asserts it
+agrees with categorize_transaction() on every description
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+import transform
+from transform import categorize_descriptions, categorize_transaction
+
+# Merchant words from CATEGORY_PATTERNS plus near misses and filler
+WORDS = [
+    'paycheck', 'salary', 'deposit', 'employer', 'dd -', 'dd-salary', 'direct deposit',
+    'starbucks', 'sbx', 'chipotle', '7-eleven', '7-11', 'coffee', 'restaurant', 'safa',
+    'chowmein', 'khana', 'netflix', 'spotify', 'hulu', 'disney', 'uber', 'uber eats',
+    'lyft', 'shell', 'fuel', 'gas', 'indrive', 'whole foods', 'wholefoods', 'wfm',
+    'trader joe', 'costco', 'rent', 'landlord', 'utilities', 'electric', 'water',
+    'amzn', 'amazon', 'target', 'walmart', 'dd', 'employ', 'netfli', 'cafe', 'x',
+    '#1234', 'pos', 'card',
+]
+
+# Letters that re.IGNORECASE folds differently from str.lower() or Hyperscan
+UNICODE_SWAPS = {'s': 'ſ', 'k': 'K', 'i': 'İ', 'e': 'é', 'a': 'à'}
+
+# Descriptions that once disagreed between backends
+KNOWN_CASES = ['ſalary', 'coſtco', 'netflİx', 'KHANA', 'DEPOSIT FROM EMPLOYER', 'café', '']
+
+MISSING = [None, np.nan, pd.NA]
+
+
+def random_descriptions(count=20000, seed=0):
+    """
+    Random descriptions built from merchant words, some with non-ASCII swaps
+    
+    Args:
+        count (int): Number of descriptions
+        seed (int): Random seed, so failures can be reproduced
+    
+    Returns:
+        list: Descriptions
+    """
+    rng = random.Random(seed)
+    descriptions = []
+    for _ in range(count):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        if rng.random() < 0.5:
+            text = text.upper()
+        if rng.random() < 0.3:
+            text = ''.join(
+                UNICODE_SWAPS[char.lower()] if char.lower() in UNICODE_SWAPS and rng.random() < 0.3 else char
+                for char in text
+            )
+        descriptions.append(text)
+    return descriptions
+
+
+def check_backends(descriptions):
+    """
+    Assert every available backend matches categorize_transaction()
+    
+    Backends are turned off one at a time, in the order
+    categorize_descriptions() prefers them, ending with the plain regex.
+    
+    Args:
+        descriptions (list): Descriptions to categorize (may contain nulls)
+    
+    Returns:
+        list: Names of the backends checked
+    """
+    saved = (transform._KEYWORD_AUTOMATON, transform._KEYWORD_TABLE, transform._HYPERSCAN)
+    names = ['Aho-Corasick', 'numba keyword table', 'Hyperscan', 'regex']
+    series = pd.Series(descriptions, dtype=object)
+    checked = []
+    
+    try:
+        for number, name in enumerate(names):
+            # Everything preferred over this backend is disabled
+            enabled = [backend if i >= number else None for i, backend in enumerate(saved)]
+            transform._KEYWORD_AUTOMATON, transform._KEYWORD_TABLE, transform._HYPERSCAN = enabled
+            if number < len(saved) and saved[number] is None:
+                print(f"  ⏭️  {name}: not installed, skipped")
+                continue
+            
+            expected = [categorize_transaction(value) for value in descriptions]
+            actual = categorize_descriptions(series).tolist()
+            mismatches = [
+                (value, got, want) for value, got, want in zip(descriptions, actual, expected) if got != want
+            ]
+            assert not mismatches, f"{name}: {len(mismatches)} mismatches, e.g. {mismatches[:5]}"
+            print(f"  ✅ {name}: {len(descriptions)} descriptions match")
+            checked.append(name)
+    finally:
+        transform._KEYWORD_AUTOMATON, transform._KEYWORD_TABLE, transform._HYPERSCAN = saved
+    
+    return checked
+
+
+def check_known_cases():
+    """
+    Assert the descriptions that once disagreed get their expected category
+    """
+    expected = {'ſalary': 'Income', 'coſtco': 'Groceries', 'netflİx': 'Entertainment', None: 'Other'}
+    for value, category in expected.items():
+        assert categorize_transaction(value) == category, f"{value!r}: {categorize_transaction(value)}"
+    actual = categorize_descriptions(pd.Series(list(expected), dtype=object)).tolist()
+    assert actual == list(expected.values()), f"categorize_descriptions: {actual}"
+    print("  ✅ Known cases categorized as expected")
+
+
+if __name__ == "__main__":
+    print(f"\n{'='*60}")
+    print("🧪 CATEGORIZATION CONSISTENCY TEST")
+    print(f"{'='*60}")
+    
+    sample = pd.read_csv('sample_data/MOCK_DATA(1).csv')['description'].tolist()
+    descriptions = random_descriptions() + KNOWN_CASES + MISSING + sample
+    
+    print("\n1️⃣ Checking known cases...")
+    check_known_cases()
+    
+    print(f"\n2️⃣ Comparing backends on {len(descriptions)} descriptions...")
+    check_backends(descriptions)
+    
+    print(f"\n{'='*60}")
+    print("✅ ALL BACKENDS AGREE!")
+    print(f"{'='*60}\n")
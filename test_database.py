@@ -2,10 +2,65 @@
 Database Connection Test Script
 Run this to verify your PostgreSQL setup is working
 """
+import logging
+import sys
+
 from database import test_connection, get_transaction_count, get_latest_transactions, create_table_if_not_exists
+import database
 import pandas as pd
 
 
+def check_partition_added_mid_load(years=(1901, 1902)):
+    """
+    Load rows for one year, then for a year whose partition is attached
+    part-way through, all in one transaction (as a multi-chunk file does)
+    
+    The transaction is rolled back and partitions created for the test
+    are dropped again, so existing data is left untouched.
+    
+    Args:
+        years (tuple): Two years with no real transactions
+        
+    Returns:
+        int: Rows routed (and rolled back)
+    """
+    names = [f"transactions_{year}" for year in years]
+    with database.get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s), to_regclass(%s)", names)
+        existing = {name for name, oid in zip(names, cur.fetchone()) if oid is not None}
+        conn.commit()
+    
+    try:
+        with database.get_connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    routed = 0
+                    locked_years = set()
+                    for year in years:
+                        # Big enough for the COPY path
+                        batch = pd.DataFrame({
+                            'transaction_date': pd.to_datetime([f"{year}-06-01"] * database.COPY_MIN_ROWS),
+                            'transaction_desc': 'PARTITION TEST',
+                            'category': 'Other',
+                            'transaction_type': 'Debit',
+                            'amount': -1.0,
+                            'month_year': f"{year}-06",
+                        })
+                        database._prepare_partitions(cur, [year], locked_years)
+                        database._write_batch(cur, batch)
+                        routed += len(batch)
+                    return routed
+            finally:
+                conn.rollback()
+    finally:
+        with database.get_connection() as conn, conn.cursor() as cur:
+            for name in names:
+                if name not in existing:
+                    cur.execute(f"DROP TABLE IF EXISTS {name}")
+            conn.commit()
+        database._partition_years.difference_update(years)
+
+
 def run_database_tests():
     """
     Comprehensive database testing
@@ -56,6 +111,15 @@ def run_database_tests():
         print("\n4️⃣ No transactions in database yet")
         print("  💡 Drop a CSV file into ./finance/watch to add data")
     
+    # Test 5: Partition attached while a load is in progress
+    print("\n5️⃣ Testing a partition added during a load...")
+    try:
+        routed = check_partition_added_mid_load()
+        print(f"  ✅ Routed {routed} rows, including to the new partition (rolled back)")
+    except Exception as e:
+        print(f"  ❌ Mid-load partition test failed: {e}")
+        return False
+    
     print("\n" + "="*60)
     print("✅ ALL DATABASE TESTS PASSED!")
     print("="*60)
@@ -70,6 +134,9 @@ def run_database_tests():
 
 
 if __name__ == "__main__":
+    # Show the messages database.py logs (table ready, rows inserted)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    
     success = run_database_tests()
     
     if not success:
@@ -3,9 +3,10 @@
 Manual test script - processes a single CSV without file watching
 Use this to debug your transformation logic
 """
-import pandas as pd
+import logging
+import sys
 from datetime import datetime
-from transform import clean_transaction_data
+from transform import clean_transaction_data, read_transaction_csv
 
 
 def test_single_file(input_path, output_path=None):
@@ -25,7 +26,7 @@ def test_single_file(input_path, output_path=None):
     try:
         # EXTRACT
         print(f"\n📥 Reading: {input_path}")
-        df = pd.read_csv(input_path)
+        df = read_transaction_csv(input_path)
         print(f"  ✅ Loaded {len(df)} rows, {len(df.columns)} columns")
         print(f"  📋 Columns: {list(df.columns)}")
         
@@ -77,6 +78,9 @@ def test_single_file(input_path, output_path=None):
 
 
 if __name__ == "__main__":
+    # Show every transformation step
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s', stream=sys.stdout)
+    
     # EDIT THIS PATH to point to your test CSV
     test_file = "sample_data/MOCK_DATA(1).csv"
     
@@ -3,31 +3,450 @@
 Data Transformation Module
 Cleans raw bank statement CSV data
 """
+import csv
+import logging
+import re
+import sys
+
 import pandas as pd
 import numpy as np
-from config import CATEGORY_PATTERNS, DATE_FORMAT
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from config import (
+    CATEGORY_PATTERNS, CATEGORY_GROUPS, CATEGORY_REGEX, DATE_FORMAT,
+    READ_DTYPES, CSV_CHUNK_BYTES, DEDUPE_COLUMNS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Optional accelerators for categorize_descriptions()
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Category codes used by the vectorized categorizers: index into this list
+CATEGORY_NAMES = list(CATEGORY_PATTERNS) + ['Other']
+OTHER_CODE = len(CATEGORY_PATTERNS)
+TRANSACTION_TYPES = ['Credit', 'Debit', 'Neutral', 'Unknown']
 
 
 def categorize_transaction(description):
     """
     Rule-based categorization based on merchant keywords
     
+    With pyahocorasick installed, one automaton pass finds the candidate
+    categories and only those are checked against their regex.
+    
     Args:
         description (str): Transaction description
         
     Returns:
         str: Category name
     """
-    if pd.isna(description):
+    # None/NA, or NaN (the only value not equal to itself); cheaper than pd.isna
+    if description is None or description is pd.NA or description != description:
         return 'Other'
     
-    description = str(description)
+    text = str(description)
+    # Keywords are matched on str.lower(), which folds some non-ASCII
+    # letters differently from re.IGNORECASE; those go to the regex
+    if _KEYWORD_AUTOMATON is not None and text.isascii():
+        automaton, always, exact = _KEYWORD_AUTOMATON
+        candidates = always
+        for _, keyword_mask in automaton.iter(text.lower()):
+            candidates |= keyword_mask
+        for code, pattern in enumerate(CATEGORY_PATTERNS.values()):
+            if (candidates >> code) & 1 and ((exact >> code) & 1 or pattern.search(text)):
+                return CATEGORY_NAMES[code]
+        return 'Other'
+    
+    match = CATEGORY_REGEX.search(text)
+    return CATEGORY_GROUPS[match.lastgroup] if match else 'Other'
+
+
+def _extract_literals(pattern):
+    """
+    Find a keyword that every match of each alternative must contain
+    
+    e.g. r'STARBUCKS|WHOLE\s*FOODS' -> ['starbucks', 'whole'], not exact
+    
+    Args:
+        pattern (re.Pattern): Category pattern
+        
+    Returns:
+        tuple: (keywords, exact) - one lowercase keyword per top-level
+            alternative, and whether every alternative is a plain
+            case-insensitive literal (so finding a keyword is already a
+            match). keywords is None if the pattern can't be reduced.
+    """
+    text = pattern.pattern
+    if '(' in text or '[' in text:
+        return None, False
+    
+    keywords = []
+    exact = bool(pattern.flags & re.IGNORECASE)
+    best, run = '', ''
+    last_literal = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '|':
+            best = max(best, run, key=len)
+            if not best:
+                return None, False
+            keywords.append(best.lower())
+            best, run = '', ''
+            last_literal = False
+            i += 1
+            continue
+        
+        if char == '\\' and i + 1 < len(text) and not text[i + 1].isalnum():
+            # Escaped literal, e.g. \- or \.
+            run += text[i + 1]
+            last_literal = True
+            i += 2
+            continue
+        if char not in '\\.^$*+?{}':
+            run += char
+            last_literal = True
+            i += 1
+            continue
+        
+        # Anything else ends the literal run; optional quantifiers also
+        # make the character before them optional
+        if char in '*?{' and last_literal:
+            run = run[:-1]
+        best = max(best, run, key=len)
+        run = ''
+        exact = False
+        last_literal = False
+        if char == '{':
+            i = text.find('}', i) + 1 or len(text)
+        else:
+            i += 2 if char == '\\' else 1
+    
+    best = max(best, run, key=len)
+    if not best:
+        return None, False
+    keywords.append(best.lower())
+    return keywords, exact
+
+
+def _collect_keywords():
+    """
+    Gather the prefilter keywords of every category
+    
+    Returns:
+        tuple: (masks, always, exact) where masks maps each keyword to a
+            bitmask of category codes, always is the bitmask of categories
+            without keywords (candidates for every row) and exact the
+            bitmask of categories whose keywords are full matches, or None
+            if there is nothing to prefilter on
+    """
+    if len(CATEGORY_PATTERNS) > 62:
+        return None
+    
+    masks = {}
+    always = exact = 0
+    for code, pattern in enumerate(CATEGORY_PATTERNS.values()):
+        keywords, is_exact = _extract_literals(pattern)
+        if keywords is None:
+            always |= 1 << code
+            continue
+        if is_exact:
+            exact |= 1 << code
+        for keyword in keywords:
+            masks[keyword] = masks.get(keyword, 0) | (1 << code)
+    
+    return (masks, always, exact) if masks else None
+
+
+def _build_keyword_automaton(keywords):
+    """
+    Build one Aho-Corasick automaton over all category keywords
+    
+    Args:
+        keywords (tuple): Result of _collect_keywords()
+        
+    Returns:
+        tuple: (automaton, always, exact), or None if pyahocorasick is
+            not installed
+    """
+    if ahocorasick is None or keywords is None:
+        return None
+    
+    masks, always, exact = keywords
+    automaton = ahocorasick.Automaton()
+    for keyword, mask in masks.items():
+        automaton.add_word(keyword, mask)
+    automaton.make_automaton()
+    return automaton, always, exact
+
+
+def _build_keyword_table(keywords):
+    """
+    Pack all category keywords into flat arrays for _keyword_candidates_batch()
+    
+    Args:
+        keywords (tuple): Result of _collect_keywords()
+        
+    Returns:
+        tuple: (kw_offsets, kw_bytes, kw_masks, always, exact), or None if
+            numba is not installed
+    """
+    if numba is None or keywords is None:
+        return None
+    
+    masks, always, exact = keywords
+    encoded = [keyword.encode('utf-8') for keyword in masks]
+    kw_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(keyword) for keyword in encoded], out=kw_offsets[1:])
+    kw_bytes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    kw_masks = np.array(list(masks.values()), dtype=np.int64)
+    return kw_offsets, kw_bytes, kw_masks, always, exact
+
+
+def _keyword_candidates_batch(desc_offsets, desc_bytes, kw_offsets, kw_bytes, kw_masks, always):
+    """
+    Bitmask of candidate categories per description (substring scan)
+    
+    Descriptions and keywords are passed as one concatenated byte buffer
+    each plus offsets, so the whole batch runs without touching Python
+    objects. JIT-compiled with numba when available.
+    """
+    n_rows = len(desc_offsets) - 1
+    candidates = np.empty(n_rows, dtype=np.int64)
+    for row in range(n_rows):
+        start, end = desc_offsets[row], desc_offsets[row + 1]
+        mask = always
+        for k in range(len(kw_masks)):
+            if mask & kw_masks[k] == kw_masks[k]:
+                continue
+            kw_start = kw_offsets[k]
+            kw_len = kw_offsets[k + 1] - kw_start
+            for pos in range(start, end - kw_len + 1):
+                j = 0
+                while j < kw_len and desc_bytes[pos + j] == kw_bytes[kw_start + j]:
+                    j += 1
+                if j == kw_len:
+                    mask |= kw_masks[k]
+                    break
+        candidates[row] = mask
+    return candidates
+
+
+if numba is not None:
+    _keyword_candidates_batch = numba.njit(cache=True)(_keyword_candidates_batch)
+
+def _build_hyperscan_database():
+    """
+    Compile every category pattern into one Hyperscan database
+    
+    Pattern ids are the category codes, so the lowest id reported for a
+    description is its category.
+    
+    Returns:
+        tuple: (database, scratch), or None if hyperscan is not installed
+            or can't compile one of the patterns
+    """
+    if hyperscan is None:
+        return None
+    
+    patterns = list(CATEGORY_PATTERNS.values())
+    base_flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    try:
+        database.compile(
+            expressions=[pattern.pattern.encode('utf-8') for pattern in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[
+                base_flags | (hyperscan.HS_FLAG_CASELESS if pattern.flags & re.IGNORECASE else 0)
+                for pattern in patterns
+            ],
+        )
+    except hyperscan.error:
+        return None
+    return database, hyperscan.Scratch(database)
+
+
+_KEYWORDS = _collect_keywords()
+_KEYWORD_TABLE = _build_keyword_table(_KEYWORDS)
+_KEYWORD_AUTOMATON = _build_keyword_automaton(_KEYWORDS)
+_HYPERSCAN = _build_hyperscan_database()
+
+
+def _resolve_candidates(values, candidates, exact):
+    """
+    Pick the winning category per row from candidate bitmasks
+    
+    Categories are tried in priority order. Candidates from exact
+    categories are accepted as-is; the rest, and every category for
+    non-ASCII descriptions, are confirmed with the category's regex.
+    
+    Args:
+        values (np.ndarray): Descriptions (str objects)
+        candidates (np.ndarray): int64 bitmask of candidate categories per row
+        exact (int): Bitmask of categories that need no regex confirmation
+        
+    Returns:
+        np.ndarray: int8 category code per row (OTHER_CODE if none)
+    """
+    # str.lower() and re.IGNORECASE fold some non-ASCII letters differently
+    # (the regex matches 'ſ' to 's', the Kelvin sign to 'k'), so keywords
+    # can't be trusted there: every category is a candidate for those rows
+    # and each is confirmed with its regex
+    non_ascii = np.array([not value.isascii() for value in values], dtype=bool)
+    candidates = np.where(non_ascii, (1 << OTHER_CODE) - 1, candidates)
+    
+    codes = np.full(len(values), OTHER_CODE, dtype=np.int8)
+    for code, pattern in enumerate(CATEGORY_PATTERNS.values()):
+        rows = np.flatnonzero((codes == OTHER_CODE) & ((candidates >> code) & 1).astype(bool))
+        confirm = rows[non_ascii[rows]] if (exact >> code) & 1 else rows
+        if len(confirm):
+            matched = np.array([pattern.search(values[row]) is not None for row in confirm], dtype=bool)
+            rows = np.setdiff1d(rows, confirm[~matched], assume_unique=True)
+        codes[rows] = code
+    return codes
+
+
+def _categorize_keywords(values):
+    """
+    Category codes via the Aho-Corasick keyword prefilter
+    
+    Args:
+        values (np.ndarray): Descriptions (str objects)
+        
+    Returns:
+        np.ndarray: int8 category code per row
+    """
+    automaton, always, exact = _KEYWORD_AUTOMATON
+    candidates = np.empty(len(values), dtype=np.int64)
+    for row, value in enumerate(values):
+        mask = always
+        for _, keyword_mask in automaton.iter(value.lower()):
+            mask |= keyword_mask
+        candidates[row] = mask
+    return _resolve_candidates(values, candidates, exact)
+
+
+def _categorize_keyword_table(values):
+    """
+    Category codes via the numba keyword scan
+    
+    Args:
+        values (np.ndarray): Descriptions (str objects)
+        
+    Returns:
+        np.ndarray: int8 category code per row
+    """
+    kw_offsets, kw_bytes, kw_masks, always, exact = _KEYWORD_TABLE
+    encoded = [value.lower().encode('utf-8') for value in values]
+    desc_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=desc_offsets[1:])
+    desc_bytes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    candidates = _keyword_candidates_batch(desc_offsets, desc_bytes, kw_offsets, kw_bytes, kw_masks, always)
+    return _resolve_candidates(values, candidates, exact)
+
+
+def _categorize_hyperscan(values):
+    """
+    Category codes via the Hyperscan database, one scan per description
+    
+    Args:
+        values (np.ndarray): Descriptions (str objects)
+        
+    Returns:
+        np.ndarray: int8 category code per row
+    """
+    database, scratch = _HYPERSCAN
+    codes = np.full(len(values), OTHER_CODE, dtype=np.int8)
+    
+    def on_match(code, start, end, flags, row):
+        if code < codes[row]:
+            codes[row] = code
+        # Nothing can beat the first category, stop scanning this row
+        return code == 0
     
-    for category, pattern in CATEGORY_PATTERNS.items():
-        if pattern.search(description):
-            return category
+    group_codes = {group: code for code, group in enumerate(CATEGORY_GROUPS)}
+    for row, value in enumerate(values):
+        if not value.isascii():
+            # Hyperscan's caseless mode folds some non-ASCII letters
+            # differently from re.IGNORECASE (e.g. 'İ' vs 'i'); use the regex
+            match = CATEGORY_REGEX.search(value)
+            if match:
+                codes[row] = group_codes[match.lastgroup]
+            continue
+        try:
+            database.scan(value.encode('utf-8'), match_event_handler=on_match, context=row, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            pass
+    return codes
+
+
+def _categorize_regex(descriptions):
+    """
+    Category codes via one pass of the fused category regex
+    
+    CATEGORY_REGEX has one named group per category, in priority order,
+    and only the winning group is set, so the code is the index of the
+    first non-null column.
     
-    return 'Other'
+    Args:
+        descriptions (pd.Series): Transaction descriptions (string dtype)
+        
+    Returns:
+        np.ndarray: int8 category code per row
+    """
+    hits = descriptions.str.extract(CATEGORY_REGEX)[list(CATEGORY_GROUPS)].notna().to_numpy()
+    codes = hits.argmax(axis=1).astype(np.int8)
+    codes[~hits.any(axis=1)] = OTHER_CODE
+    return codes
+
+
+def categorize_descriptions(descriptions):
+    """
+    Vectorized categorize_transaction() over a whole column
+    
+    Uses a single Aho-Corasick pass per description when pyahocorasick is
+    installed, else a JIT-compiled keyword scan over the whole batch when
+    numba is, else a Hyperscan multi-pattern scan when hyperscan is,
+    otherwise a single str.extract() pass of the fused regex. Statements
+    repeat the same merchants a lot, so only the distinct descriptions are
+    categorized and the result is mapped back to the rows.
+    
+    Args:
+        descriptions (pd.Series): Transaction descriptions
+        
+    Returns:
+        pd.Series: Category per row (categorical, categories in CATEGORY_NAMES order)
+    """
+    row_codes, uniques = pd.factorize(descriptions)
+    strings = pd.Series(uniques).astype('string')
+    if _KEYWORD_AUTOMATON is not None or _KEYWORD_TABLE is not None or _HYPERSCAN is not None:
+        values = strings.to_numpy(dtype=object)
+        if _KEYWORD_AUTOMATON is not None:
+            codes = _categorize_keywords(values)
+        elif _KEYWORD_TABLE is not None:
+            codes = _categorize_keyword_table(values)
+        else:
+            codes = _categorize_hyperscan(values)
+    else:
+        codes = _categorize_regex(strings)
+    # Missing descriptions have row code -1, which picks the trailing Other
+    codes = np.append(codes, np.int8(OTHER_CODE))[row_codes]
+    return pd.Series(pd.Categorical.from_codes(codes, CATEGORY_NAMES), index=descriptions.index)
 
 
 def derive_transaction_type(amount):
@@ -40,7 +459,7 @@ def derive_transaction_type(amount):
     Returns:
         str: 'Credit', 'Debit', or 'Neutral'
     """
-    if pd.isna(amount):
+    if amount is None or amount is pd.NA or amount != amount:
         return "Unknown"
     elif amount > 0:
         return "Credit"
@@ -50,6 +469,125 @@ def derive_transaction_type(amount):
         return "Neutral"
 
 
+def parse_dates(dates):
+    """
+    Parse date strings with DATE_FORMAT, one parse per distinct string
+    
+    Statements repeat the same few dates over and over, so the distinct
+    strings are parsed once and broadcast back with their factorize codes.
+    
+    Args:
+        dates (pd.Series): Date strings
+        
+    Returns:
+        pd.Series: datetime64[ns] per row (NaT where missing or invalid)
+    """
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(uniques, format=DATE_FORMAT, errors='coerce', exact=True).to_numpy(dtype='datetime64[ns]')
+    # Code -1 (missing) picks the trailing NaT
+    parsed = np.append(parsed, np.datetime64('NaT', 'ns'))
+    return pd.Series(parsed[codes], index=dates.index)
+
+
+def read_transaction_csv(filepath):
+    """
+    Read a raw bank statement CSV
+    
+    Parsed with pyarrow's multi-threaded CSV reader, reading only the
+    columns in READ_DTYPES with their declared types. Dates are kept as
+    strings (they are parsed in clean_transaction_data so bad ones are
+    dropped rather than failing the whole file) and amount is read
+    straight into float64.
+    
+    Args:
+        filepath (str): Path to the CSV file
+        
+    Returns:
+        pd.DataFrame: Raw transaction data
+    """
+    _require_columns(_read_csv_header(filepath))
+    table = pacsv.read_csv(
+        filepath,
+        parse_options=_csv_parse_options(),
+        convert_options=_csv_convert_options(),
+    )
+    return table.to_pandas()
+
+
+def iter_transaction_csv(filepath):
+    """
+    Read a raw bank statement CSV in chunks of about CSV_CHUNK_BYTES
+    
+    Same parsing as read_transaction_csv(), but streamed so memory stays
+    bounded however large the file is.
+    
+    Args:
+        filepath (str): Path to the CSV file
+        
+    Yields:
+        pd.DataFrame: Raw transaction data, one chunk at a time (a single
+            empty frame if the file has no rows)
+    """
+    _require_columns(_read_csv_header(filepath))
+    reader = pacsv.open_csv(
+        filepath,
+        read_options=pacsv.ReadOptions(block_size=CSV_CHUNK_BYTES),
+        parse_options=_csv_parse_options(),
+        convert_options=_csv_convert_options(),
+    )
+    empty = True
+    for batch in reader:
+        if batch.num_rows:
+            empty = False
+            yield batch.to_pandas()
+    if empty:
+        yield reader.schema.empty_table().to_pandas()
+
+
+def _read_csv_header(filepath):
+    """
+    Column names from the first line of a CSV
+    
+    Checked before reading: pyarrow's include_columns would otherwise fail
+    on the first missing column with an ArrowKeyError naming only that one.
+    
+    Args:
+        filepath (str): Path to the CSV file
+        
+    Returns:
+        list: Column names (empty if the file is empty)
+    """
+    with open(filepath, newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+
+def _csv_parse_options():
+    """
+    Parsing rules for raw CSVs
+    
+    Quoted descriptions may span lines (as pd.read_csv allows); without
+    newlines_in_values pyarrow splits such rows at block boundaries.
+    
+    Returns:
+        pacsv.ParseOptions: Options for pacsv.read_csv / pacsv.open_csv
+    """
+    return pacsv.ParseOptions(newlines_in_values=True)
+
+
+def _csv_convert_options():
+    """
+    Column selection and types for reading raw CSVs
+    
+    Returns:
+        pacsv.ConvertOptions: Options built from READ_DTYPES
+    """
+    return pacsv.ConvertOptions(
+        column_types={column: pa.type_for_alias(dtype) for column, dtype in READ_DTYPES.items()},
+        include_columns=list(READ_DTYPES),
+        strings_can_be_null=True,  # empty cells become NaN, as with pd.read_csv
+    )
+
+
 def validate_raw_data(df):
     """
     Validate raw CSV has expected structure
@@ -60,16 +598,28 @@ def validate_raw_data(df):
     Raises:
         ValueError: If validation fails
     """
-    from config import EXPECTED_COLUMNS
-    
-    missing_cols = set(EXPECTED_COLUMNS) - set(df.columns)
-    if missing_cols:
-        raise ValueError(f"Missing required columns: {missing_cols}")
+    _require_columns(df.columns)
     
     if df.empty:
         raise ValueError("DataFrame is empty")
     
-    print(f"✅ Raw data validation passed ({len(df)} rows)")
+    logger.debug("✅ Raw data validation passed (%d rows)", len(df))
+
+def _require_columns(columns):
+    """
+    Check that all of EXPECTED_COLUMNS are present
+    
+    Args:
+        columns (iterable): Column names
+        
+    Raises:
+        ValueError: If any are missing
+    """
+    from config import EXPECTED_COLUMNS
+    
+    missing_cols = set(EXPECTED_COLUMNS) - set(columns)
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
 
 def validate_clean_data(df):
     """
@@ -93,17 +643,16 @@ def validate_clean_data(df):
         'All transaction types assigned': df['transaction_type'].isna().sum() == 0,
     }
     
-    print("\n📋 Data Quality Checks:")
+    logger.debug("📋 Data Quality Checks:")
     for check, passed in checks.items():
-        status = "✅" if passed else "❌"
-        print(f"  {status} {check}")
         if not passed:
-            # DEBUG: Print actual dtype for datetime check
+            logger.error("  ❌ %s", check)
             if check == 'Date is datetime':
-                print(f"      Actual dtype: {df['transaction_date'].dtype}")
+                logger.error("      Actual dtype: %s", df['transaction_date'].dtype)
             raise ValueError(f"Validation failed: {check}")
+        logger.debug("  ✅ %s", check)
     
-    print("\n✅ All validation checks passed!")
+    logger.debug("✅ All validation checks passed!")
     return True
 
 def clean_transaction_data(df):
@@ -116,86 +665,128 @@ def clean_transaction_data(df):
     Returns:
         pd.DataFrame: Cleaned transaction data
     """
-    print("\n" + "="*60)
-    print("🔄 TRANSFORMATION PIPELINE STARTED")
-    print("="*60)
+    logger.info("🔄 TRANSFORMATION PIPELINE STARTED (%d rows)", len(df))
     
     # Step 1: Validate input
-    print("\n1️⃣ Validating raw data...")
+    logger.debug("1️⃣ Validating raw data...")
     validate_raw_data(df)
     
+    # Steps 2-6 work on plain arrays and a row mask; the only frame built
+    # is the result
+    
     # Step 2: Remove duplicates
-    print("\n2️⃣ Checking for duplicates...")
-    initial_rows = len(df)
-    df = df.drop_duplicates()
-    duplicates_removed = initial_rows - len(df)
+    logger.debug("2️⃣ Checking for duplicates...")
+    keep = ~df.duplicated(subset=DEDUPE_COLUMNS).to_numpy()
+    duplicates_removed = len(df) - keep.sum()
     if duplicates_removed > 0:
-        print(f"  ⚠️  Removed {duplicates_removed} duplicate rows")
+        logger.warning("  ⚠️  Removed %d duplicate rows", duplicates_removed)
     else:
-        print(f"  ✅ No duplicates found")
-    
-    # Step 3: Apply categorization
-    print("\n3️⃣ Categorizing transactions...")
-    df['category_corrected'] = df['description'].apply(categorize_transaction)
-    category_dist = df['category_corrected'].value_counts()
-    print(f"  ✅ Categories assigned:")
-    for cat, count in category_dist.items():
-        print(f"     - {cat}: {count}")
-    
-    # Step 4: Derive transaction type
-    print("\n4️⃣ Deriving transaction types...")
-    df['derived_transaction_type'] = df['amount'].apply(derive_transaction_type)
-    type_dist = df['derived_transaction_type'].value_counts()
-    print(f"  ✅ Transaction types:")
-    for ttype, count in type_dist.items():
-        print(f"     - {ttype}: {count}")
-    
-    # Step 5: Parse dates
-    print("\n5️⃣ Parsing dates...")
-    df['date_dt'] = pd.to_datetime(df['date'], format=DATE_FORMAT, errors='coerce')
-    invalid_dates = df['date_dt'].isna().sum()
+        logger.debug("  ✅ No duplicates found")
+    
+    # Step 3: Parse dates (first, so rows that get dropped are never categorized)
+    logger.debug("3️⃣ Parsing dates...")
+    dates = parse_dates(df['date']).to_numpy()
+    invalid = keep & np.isnat(dates)
+    invalid_dates = invalid.sum()
     if invalid_dates > 0:
-        print(f"  ⚠️  Warning: {invalid_dates} invalid dates found, dropping...")
-        df = df.dropna(subset=['date_dt'])
+        logger.warning("  ⚠️  Warning: %d invalid dates found, dropping...", invalid_dates)
+        keep &= ~invalid
     else:
-        print(f"  ✅ All dates parsed successfully")
+        logger.debug("  ✅ All dates parsed successfully")
+    
+    rows = np.flatnonzero(keep)
+    dates = dates[rows]
+    descriptions = df['description'].iloc[rows]
+    amounts = df['amount'].to_numpy(dtype=float)[rows]
+    
+    # Step 4: Apply categorization
+    logger.debug("4️⃣ Categorizing transactions...")
+    categories = categorize_descriptions(descriptions).array
+    if logger.isEnabledFor(logging.DEBUG):
+        category_dist = pd.Series(categories).value_counts()
+        logger.debug("  ✅ Categories assigned: %s", category_dist[category_dist > 0].to_dict())
+    
+    # Step 5: Derive transaction type
+    logger.debug("5️⃣ Deriving transaction types...")
+    # Same rules as derive_transaction_type(), over the whole column at once
+    type_codes = np.select(
+        [np.isnan(amounts), amounts > 0, amounts < 0],
+        [TRANSACTION_TYPES.index('Unknown'), TRANSACTION_TYPES.index('Credit'), TRANSACTION_TYPES.index('Debit')],
+        default=TRANSACTION_TYPES.index('Neutral')
+    )
+    transaction_types = pd.Categorical.from_codes(type_codes, TRANSACTION_TYPES)
+    if logger.isEnabledFor(logging.DEBUG):
+        type_dist = pd.Series(transaction_types).value_counts()
+        logger.debug("  ✅ Transaction types: %s", type_dist[type_dist > 0].to_dict())
     
     # Step 6: Create final structure
-    print("\n6️⃣ Creating final DataFrame...")
-    clean_df = df[[
-        "date_dt",
-        "description",
-        "category_corrected",
-        "derived_transaction_type",
-        "amount"
-    ]].copy()
-    
-    # Add month_year for aggregation
-    clean_df['month_year'] = clean_df['date_dt'].dt.strftime('%Y-%m')
-    
-    # Rename to database-friendly names
-    clean_df.rename(columns={
-        "date_dt": "transaction_date",
-        "category_corrected": "category",
-        "derived_transaction_type": "transaction_type",
-        "description": "transaction_desc"
-    }, inplace=True)
+    logger.debug("6️⃣ Creating final DataFrame...")
+    # Add month_year for aggregation: format each distinct month once
+    # instead of a strftime per row
+    unique_months, month_codes = np.unique(dates.astype('datetime64[M]'), return_inverse=True)
+    month_year = pd.Categorical.from_codes(month_codes, np.datetime_as_string(unique_months, unit='M'))
+    
+    # Assemble the result from the computed columns, with database-friendly names
+    clean_df = pd.DataFrame({
+        'transaction_date': dates,
+        'transaction_desc': descriptions.to_numpy(),
+        'category': categories,
+        'transaction_type': transaction_types,
+        'amount': amounts,
+        'month_year': month_year
+    }, index=df.index[rows], copy=False)
     
     # Step 7: Final validation
-    print("\n7️⃣ Validating cleaned data...")
+    logger.debug("7️⃣ Validating cleaned data...")
     validate_clean_data(clean_df)
     
-    print("\n" + "="*60)
-    print(f"✨ TRANSFORMATION COMPLETE: {len(clean_df)} rows ready")
-    print("="*60 + "\n")
+    logger.info("✨ TRANSFORMATION COMPLETE: %d rows ready", len(clean_df))
     
     return clean_df
 
 
+def clean_transaction_chunks(chunks):
+    """
+    Run clean_transaction_data() over a stream of raw chunks
+    
+    Duplicates are removed across the whole stream, not just within each
+    chunk: rows already seen in an earlier chunk (compared by a hash of
+    their DEDUPE_COLUMNS) are dropped before cleaning.
+    
+    Args:
+        chunks (iterable): Raw transaction DataFrames, e.g. from
+            iter_transaction_csv()
+            
+    Yields:
+        pd.DataFrame: Cleaned transaction data, one chunk at a time
+    """
+    # Sorted hashes of every row yielded so far; new ones are merged in
+    # place so earlier chunks are never re-sorted
+    seen = np.empty(0, dtype=np.uint64)
+    for chunk in chunks:
+        hashes = pd.util.hash_pandas_object(chunk[DEDUPE_COLUMNS], index=False).to_numpy()
+        # Probe with the sorted distinct hashes; far fewer cache misses than
+        # searching in row order
+        unique_hashes, row_codes = np.unique(hashes, return_inverse=True)
+        positions = np.searchsorted(seen, unique_hashes)
+        found = positions < len(seen)
+        found[found] = seen[positions[found]] == unique_hashes[found]
+        if found.any():
+            duplicated = found[row_codes]
+            logger.warning("  ⚠️  Removed %d rows duplicated from earlier chunks", duplicated.sum())
+            chunk = chunk[~duplicated]
+            if chunk.empty:
+                continue
+        seen = np.insert(seen, positions[~found], unique_hashes[~found])
+        yield clean_transaction_data(chunk)
+
+
 # For standalone testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s', stream=sys.stdout)
+    
     # Test with sample data
-    test_df = pd.read_csv('sample_data/MOCK_DATA(1).csv')
+    test_df = read_transaction_csv('sample_data/MOCK_DATA(1).csv')
     cleaned = clean_transaction_data(test_df)
     print(cleaned.head())
     print(f"\nShape: {cleaned.shape}")
@@ -2,22 +2,45 @@
 File Watcher with Database Integration
 Watches folder for new CSV files and loads them into PostgreSQL
 """
+import logging
 import os
 import time
 import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import partial
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import pandas as pd
 
-from config import WATCH_FOLDER, PROCESSED_FOLDER, FAILED_FOLDER
-from transform import clean_transaction_data
-from database import insert_transactions, test_connection
+from config import WATCH_FOLDER, PROCESSED_FOLDER, FAILED_FOLDER, MAX_WORKERS, LOG_LEVEL
+from transform import clean_transaction_chunks, iter_transaction_csv
+from database import insert_transaction_batches, test_connection
+
+
+logger = logging.getLogger(__name__)
 
 
 class CSVHandler(FileSystemEventHandler):
     """Handles new CSV files dropped into the watch folder"""
     
+    def __init__(self, max_workers=MAX_WORKERS):
+        super().__init__()
+        self.max_workers = max_workers
+        self.executor = self.new_executor()
+    
+    def __getstate__(self):
+        # Workers receive a copy of the handler without the executor
+        state = self.__dict__.copy()
+        state.pop('executor', None)
+        return state
+    
+    def new_executor(self):
+        """Worker processes for process_file (each sets up its own logging)"""
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=configure_logging)
+    
     def on_created(self, event):
         """Triggered when a new file is created"""
         if event.is_directory or not event.src_path.endswith('.csv'):
@@ -27,8 +50,55 @@ class CSVHandler(FileSystemEventHandler):
         print(f"🔔 NEW FILE DETECTED: {os.path.basename(event.src_path)}")
         print(f"{'='*60}")
         
-        time.sleep(2)  # Wait for file to be fully written
-        self.process_file(event.src_path)
+        # Hand the file to a worker process so several drops run in parallel
+        try:
+            future = self.executor.submit(self.handle_new_file, event.src_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for using too much memory), which
+            # leaves the pool unusable; start a fresh one
+            logger.warning("⚠️  Worker pool is broken, restarting it")
+            self.executor.shutdown(wait=False)
+            self.executor = self.new_executor()
+            future = self.executor.submit(self.handle_new_file, event.src_path)
+        future.add_done_callback(partial(self.report_worker_error, event.src_path))
+    
+    def report_worker_error(self, filepath, future):
+        """Log anything a worker raised outside process_file's own error handling"""
+        if future.cancelled() or future.exception() is None:
+            return
+        error = future.exception()
+        logger.error("❌ Worker failed on %s: %s", os.path.basename(filepath), error, exc_info=error)
+        
+        # A worker that died never got to move its file; don't leave it
+        # stranded in the watch folder
+        if isinstance(error, BrokenProcessPool) and os.path.exists(filepath):
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.move_to_failed(filepath, timestamp, f"Worker process died: {error}")
+    
+    def handle_new_file(self, filepath):
+        """Wait for the file to be fully written, then process it (runs in a worker)"""
+        self.wait_until_written(filepath)
+        self.process_file(filepath)
+    
+    def wait_until_written(self, filepath, interval=0.05, stable_for=0.2):
+        """Block until the file size stops changing (the copy has finished)"""
+        last_size = -1
+        stable_since = None
+        while True:
+            try:
+                size = os.stat(filepath).st_size
+            except OSError:
+                return  # Gone already; process_file reports the error
+            now = time.monotonic()
+            if size == last_size:
+                if stable_since is None:
+                    stable_since = now
+                if now - stable_since >= stable_for:
+                    return
+            else:
+                stable_since = None
+                last_size = size
+            time.sleep(interval)
     
     def process_file(self, filepath):
         """Complete ETL pipeline for a single CSV"""
@@ -36,56 +106,56 @@ class CSVHandler(FileSystemEventHandler):
         filename = os.path.basename(filepath)
         
         try:
-            # EXTRACT
-            print(f"\n📥 EXTRACT: Reading {filename}...")
-            df = pd.read_csv(filepath)
-            print(f"  ✅ Loaded {len(df)} rows")
+            # EXTRACT + TRANSFORM, streamed chunk by chunk so memory stays
+            # bounded for large files
+            logger.info("📥 EXTRACT: Reading %s...", filename)
+            cleaned = []
+            category_stats = []
             
-            # TRANSFORM
-            clean_df = clean_transaction_data(df)
+            def cleaned_chunks():
+                for clean_df in clean_transaction_chunks(iter_transaction_csv(filepath)):
+                    if not cleaned:
+                        cleaned.append(clean_df)  # Kept for the preview
+                    category_stats.append(
+                        clean_df.groupby('category', observed=True)['amount'].agg(['count', 'sum'])
+                    )
+                    yield clean_df
             
-            # LOAD INTO DATABASE
-            print(f"\n💾 LOAD: Inserting into PostgreSQL...")
-            rows_inserted = insert_transactions(clean_df)
+            # LOAD INTO DATABASE (all chunks in one transaction)
+            logger.info("💾 LOAD: Inserting %s into PostgreSQL...", filename)
+            rows_inserted = insert_transaction_batches(cleaned_chunks())
+            clean_df = cleaned[0]
             
-            # Show summary
-            print(f"\n📊 DATABASE SUMMARY:")
-            print(f"  ✅ Rows inserted: {rows_inserted}")
-            print(f"  📋 Columns: {list(clean_df.columns)}")
+            # Show summary (preview and distribution at DEBUG)
+            logger.info("📊 DATABASE SUMMARY (%s):", filename)
+            logger.info("  ✅ Rows inserted: %d", rows_inserted)
+            logger.info("  📋 Columns: %s", list(clean_df.columns))
             
-            # Show preview
-            print(f"\n👀 SAMPLE DATA (first 3 rows):")
-            preview_cols = ['transaction_date', 'transaction_desc', 'category', 'amount']
-            print(clean_df[preview_cols].head(3).to_string(index=False))
-            
-            print(f"\n📈 CATEGORY DISTRIBUTION:")
-            category_counts = clean_df['category'].value_counts()
-            for cat, count in category_counts.items():
-                cat_total = clean_df[clean_df['category'] == cat]['amount'].sum()
-                print(f"  - {cat}: {count} transactions (${cat_total:,.2f})")
+            if logger.isEnabledFor(logging.DEBUG):
+                preview_cols = ['transaction_date', 'transaction_desc', 'category', 'amount']
+                logger.debug("👀 SAMPLE DATA (first 3 rows):\n%s", clean_df[preview_cols].head(3).to_string(index=False))
+                
+                logger.debug("📈 CATEGORY DISTRIBUTION:")
+                category_totals = pd.concat(category_stats).groupby(level=0, observed=True).sum()
+                for cat, (count, cat_total) in category_totals.sort_values('count', ascending=False).iterrows():
+                    logger.debug("  - %s: %d transactions ($%s)", cat, count, f"{cat_total:,.2f}")
             
             # MOVE TO PROCESSED
             self.move_to_processed(filepath, timestamp)
             
-            print(f"\n{'='*60}")
-            print("✅ ETL PIPELINE COMPLETED SUCCESSFULLY!")
-            print(f"{'='*60}\n")
+            logger.info("%s\n✅ ETL PIPELINE COMPLETED SUCCESSFULLY: %s\n%s", '='*60, filename, '='*60)
             
         except Exception as e:
-            print(f"\n❌ ERROR: {e}")
-            import traceback
-            traceback.print_exc()  # Show full error trace
+            logger.exception("❌ ERROR: %s", e)  # Includes the full error trace
             self.move_to_failed(filepath, timestamp, str(e))
-            print(f"\n{'='*60}")
-            print("❌ ETL PIPELINE FAILED")
-            print(f"{'='*60}\n")
+            logger.error("%s\n❌ ETL PIPELINE FAILED: %s\n%s", '='*60, filename, '='*60)
     
     def move_to_processed(self, filepath, timestamp):
         """Move successfully processed file"""
         os.makedirs(PROCESSED_FOLDER, exist_ok=True)
         new_path = os.path.join(PROCESSED_FOLDER, f"{timestamp}_{os.path.basename(filepath)}")
         shutil.move(filepath, new_path)
-        print(f"\n📁 Original file moved to: {new_path}")
+        logger.info("📁 Original file moved to: %s", new_path)
     
     def move_to_failed(self, filepath, timestamp, error):
         """Move failed file and log error"""
@@ -99,8 +169,13 @@ class CSVHandler(FileSystemEventHandler):
             f.write(f"File: {os.path.basename(filepath)}\n")
             f.write(f"Error: {error}\n")
         
-        print(f"\n📁 Failed file: {new_path}")
-        print(f"📄 Error log: {error_log}")
+        logger.info("📁 Failed file: %s", new_path)
+        logger.info("📄 Error log: %s", error_log)
+
+
+def configure_logging():
+    """Show pipeline log messages on stdout alongside the prints (also runs in each worker)"""
+    logging.basicConfig(level=LOG_LEVEL, format='%(message)s', stream=sys.stdout)
 
 
 def start_watching():
@@ -145,8 +220,10 @@ def start_watching():
         observer.stop()
     
     observer.join()
+    event_handler.executor.shutdown(wait=True)  # Let files already being processed finish
     print("✅ File watcher stopped.\n")
 
 
 if __name__ == "__main__":
+    configure_logging()
     start_watching()
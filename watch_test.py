@@ -1,28 +1,62 @@
 # watch_test.py
 """
 TEST VERSION of File Watcher
-Saves cleaned data to CSV instead of PostgreSQL
+Saves cleaned data to Parquet instead of PostgreSQL
 """
+import logging
 import os
 import time
 import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import partial
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-from config import WATCH_FOLDER, PROCESSED_FOLDER, FAILED_FOLDER
-from transform import clean_transaction_data
+from config import WATCH_FOLDER, PROCESSED_FOLDER, FAILED_FOLDER, MAX_WORKERS, LOG_LEVEL
+from transform import clean_transaction_chunks, iter_transaction_csv
+
+
+logger = logging.getLogger(__name__)
+
+# Schema of the cleaned Parquet output. Declared rather than inferred from
+# the first chunk, which may clean to an empty or all-null frame; the
+# categoricals are dictionary-encoded with indices wide enough for any chunk
+PARQUET_SCHEMA = pa.schema([
+    ('transaction_date', pa.timestamp('ns')),
+    ('transaction_desc', pa.string()),
+    ('category', pa.dictionary(pa.int32(), pa.string())),
+    ('transaction_type', pa.dictionary(pa.int32(), pa.string())),
+    ('amount', pa.float64()),
+    ('month_year', pa.dictionary(pa.int32(), pa.string())),
+])
 
 
 class CSVHandler(FileSystemEventHandler):
     """Handles new CSV files dropped into the watch folder"""
     
-    def __init__(self, output_folder):
+    def __init__(self, output_folder, max_workers=MAX_WORKERS):
         super().__init__()
         self.output_folder = output_folder
+        self.max_workers = max_workers
+        self.executor = self.new_executor()
         os.makedirs(self.output_folder, exist_ok=True)
     
+    def __getstate__(self):
+        # Workers receive a copy of the handler without the executor
+        state = self.__dict__.copy()
+        state.pop('executor', None)
+        return state
+    
+    def new_executor(self):
+        """Worker processes for process_file (each sets up its own logging)"""
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=configure_logging)
+    
     def on_created(self, event):
         """Triggered when a new file is created"""
         if event.is_directory or not event.src_path.endswith('.csv'):
@@ -32,64 +66,122 @@ class CSVHandler(FileSystemEventHandler):
         print(f"🔔 NEW FILE DETECTED: {os.path.basename(event.src_path)}")
         print(f"{'='*60}")
         
-        time.sleep(2)  # Wait for file to be fully written
-        self.process_file(event.src_path)
+        # Hand the file to a worker process so several drops run in parallel
+        try:
+            future = self.executor.submit(self.handle_new_file, event.src_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for using too much memory), which
+            # leaves the pool unusable; start a fresh one
+            logger.warning("⚠️  Worker pool is broken, restarting it")
+            self.executor.shutdown(wait=False)
+            self.executor = self.new_executor()
+            future = self.executor.submit(self.handle_new_file, event.src_path)
+        future.add_done_callback(partial(self.report_worker_error, event.src_path))
+    
+    def report_worker_error(self, filepath, future):
+        """Log anything a worker raised outside process_file's own error handling"""
+        if future.cancelled() or future.exception() is None:
+            return
+        error = future.exception()
+        logger.error("❌ Worker failed on %s: %s", os.path.basename(filepath), error, exc_info=error)
+        
+        # A worker that died never got to move its file; don't leave it
+        # stranded in the watch folder
+        if isinstance(error, BrokenProcessPool) and os.path.exists(filepath):
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.move_to_failed(filepath, timestamp, f"Worker process died: {error}")
+    
+    def handle_new_file(self, filepath):
+        """Wait for the file to be fully written, then process it (runs in a worker)"""
+        self.wait_until_written(filepath)
+        self.process_file(filepath)
+    
+    def wait_until_written(self, filepath, interval=0.05, stable_for=0.2):
+        """Block until the file size stops changing (the copy has finished)"""
+        last_size = -1
+        stable_since = None
+        while True:
+            try:
+                size = os.stat(filepath).st_size
+            except OSError:
+                return  # Gone already; process_file reports the error
+            now = time.monotonic()
+            if size == last_size:
+                if stable_since is None:
+                    stable_since = now
+                if now - stable_since >= stable_for:
+                    return
+            else:
+                stable_since = None
+                last_size = size
+            time.sleep(interval)
     
     def process_file(self, filepath):
         """Complete ETL pipeline for a single CSV"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = os.path.basename(filepath)
         
+        output_filename = f"CLEANED_{timestamp}_{os.path.splitext(filename)[0]}.parquet"
+        output_path = os.path.join(self.output_folder, output_filename)
+        # Chunks are written under a temporary name, renamed only once the
+        # whole file has been cleaned, so a failure leaves no partial output
+        partial_path = output_path + '.partial'
+        
         try:
-            # EXTRACT
-            print(f"\n📥 EXTRACT: Reading {filename}...")
-            df = pd.read_csv(filepath)
-            print(f"  ✅ Loaded {len(df)} rows")
+            # EXTRACT + TRANSFORM + SAVE TO PARQUET (INSTEAD OF DATABASE),
+            # streamed chunk by chunk so memory stays bounded for large files
+            logger.info("📥 EXTRACT: Reading %s...", filename)
             
-            # TRANSFORM
-            clean_df = clean_transaction_data(df)
+            clean_df = None
+            writer = None
+            category_counts = []
+            rows_saved = 0
+            try:
+                for chunk in clean_transaction_chunks(iter_transaction_csv(filepath)):
+                    if clean_df is None or clean_df.empty:
+                        clean_df = chunk  # Kept for the preview
+                    if writer is None:
+                        writer = pq.ParquetWriter(partial_path, PARQUET_SCHEMA, compression='snappy')
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=PARQUET_SCHEMA, preserve_index=False))
+                    category_counts.append(chunk['category'].value_counts())
+                    rows_saved += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+            os.replace(partial_path, output_path)
             
-            # SAVE TO CSV (INSTEAD OF DATABASE)
-            output_filename = f"CLEANED_{timestamp}_{filename}"
-            output_path = os.path.join(self.output_folder, output_filename)
-            clean_df.to_csv(output_path, index=False)
+            # Show summary (preview and distribution at DEBUG)
+            logger.info("💾 SAVE: Wrote cleaned %s", filename)
+            logger.info("  ✅ Saved to: %s", output_path)
+            logger.info("  📊 Rows: %d", rows_saved)
+            logger.info("  📋 Columns: %s", list(clean_df.columns))
             
-            print(f"\n💾 SAVE: Writing cleaned data...")
-            print(f"  ✅ Saved to: {output_path}")
-            print(f"  📊 Rows: {len(clean_df)}")
-            print(f"  📋 Columns: {list(clean_df.columns)}")
-            
-            # Show preview
-            print(f"\n👀 PREVIEW (first 3 rows):")
-            print(clean_df.head(3).to_string())
-            
-            print(f"\n📈 CATEGORY DISTRIBUTION:")
-            category_counts = clean_df['category'].value_counts()
-            for cat, count in category_counts.items():
-                print(f"  - {cat}: {count}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("👀 PREVIEW (first 3 rows):\n%s", clean_df.head(3).to_string())
+                
+                logger.debug("📈 CATEGORY DISTRIBUTION:")
+                category_counts = pd.concat(category_counts).groupby(level=0, observed=True).sum()
+                for cat, count in category_counts[category_counts > 0].sort_values(ascending=False).items():
+                    logger.debug("  - %s: %d", cat, count)
             
             # MOVE TO PROCESSED
             self.move_to_processed(filepath, timestamp)
             
-            print(f"\n{'='*60}")
-            print("✅ ETL PIPELINE COMPLETED SUCCESSFULLY!")
-            print(f"{'='*60}\n")
+            logger.info("%s\n✅ ETL PIPELINE COMPLETED SUCCESSFULLY: %s\n%s", '='*60, filename, '='*60)
             
         except Exception as e:
-            print(f"\n❌ ERROR: {e}")
-            import traceback
-            traceback.print_exc()  # Show full error trace
+            logger.exception("❌ ERROR: %s", e)  # Includes the full error trace
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
             self.move_to_failed(filepath, timestamp, str(e))
-            print(f"\n{'='*60}")
-            print("❌ ETL PIPELINE FAILED")
-            print(f"{'='*60}\n")
+            logger.error("%s\n❌ ETL PIPELINE FAILED: %s\n%s", '='*60, filename, '='*60)
     
     def move_to_processed(self, filepath, timestamp):
         """Move successfully processed file"""
         os.makedirs(PROCESSED_FOLDER, exist_ok=True)
         new_path = os.path.join(PROCESSED_FOLDER, f"{timestamp}_{os.path.basename(filepath)}")
         shutil.move(filepath, new_path)
-        print(f"\n📁 Original moved to: {new_path}")
+        logger.info("📁 Original moved to: %s", new_path)
     
     def move_to_failed(self, filepath, timestamp, error):
         """Move failed file and log error"""
@@ -103,8 +195,13 @@ class CSVHandler(FileSystemEventHandler):
             f.write(f"File: {os.path.basename(filepath)}\n")
             f.write(f"Error: {error}\n")
         
-        print(f"\n📁 Failed file: {new_path}")
-        print(f"📄 Error log: {error_log}")
+        logger.info("📁 Failed file: %s", new_path)
+        logger.info("📄 Error log: %s", error_log)
+
+
+def configure_logging():
+    """Show pipeline log messages on stdout alongside the prints (also runs in each worker)"""
+    logging.basicConfig(level=LOG_LEVEL, format='%(message)s', stream=sys.stdout)
 
 
 def start_watching():
@@ -119,7 +216,7 @@ def start_watching():
     print(f"📂 Processed: {PROCESSED_FOLDER}")
     print(f"📂 Failed:    {FAILED_FOLDER}")
     print(f"{'='*60}")
-    print("\n💡 TEST MODE - Cleaned data saved as CSV")
+    print("\n💡 TEST MODE - Cleaned data saved as Parquet")
     print("   Drop CSV files into watch folder")
     print("   Check output_cleaned/ for results")
     print("   Press Ctrl+C to stop\n")
@@ -141,8 +238,10 @@ def start_watching():
         observer.stop()
     
     observer.join()
+    event_handler.executor.shutdown(wait=True)  # Let files already being processed finish
     print("✅ File watcher stopped.\n")
 
 
 if __name__ == "__main__":
+    configure_logging()
     start_watching()